@@ -5,6 +5,7 @@ Based on: https://github.com/slack-samples/bolt-python-assistant-template
 """
 
 import os
+import re
 import logging
 from typing import List, Dict
 from dotenv import load_dotenv
@@ -47,6 +48,8 @@ AVAILABLE_MODELS = {
     "claude-opus": "databricks-claude-opus-4-1",
     "gpt-120b": "databricks-gpt-oss-120b",
 }
+DEFAULT_MODEL_KEY = next(iter(AVAILABLE_MODELS))
+DEFAULT_MODEL_ID = AVAILABLE_MODELS[DEFAULT_MODEL_KEY]
 
 # Metrics tracking
 class Metrics:
@@ -63,6 +66,9 @@ metrics = Metrics()
 user_model_preferences = {}
 conversation_history = {}
 
+# Matches the bot mention token, e.g. "<@U123ABC> " or "<@U123ABC|promptbot> "
+_MENTION_RE = re.compile(r"<@[A-Z0-9]+(?:\|[^>]*)?>\s*")
+
 DEFAULT_SYSTEM_CONTENT = """You are a helpful AI assistant powered by Databricks Foundation Models.
 You can answer questions, help with coding, explain concepts, and assist with various tasks.
 Be concise, accurate, and friendly."""
@@ -70,7 +76,7 @@ Be concise, accurate, and friendly."""
 
 def call_llm(
     messages_in_thread: List[Dict[str, str]],
-    model_id: str = "databricks-llama-4-maverick",
+    model_id: str = DEFAULT_MODEL_ID,
     system_content: str = DEFAULT_SYSTEM_CONTENT,
 ):
     """Call Databricks Foundation Model using OpenAI-compatible API"""
@@ -95,11 +101,39 @@ def call_llm(
 
 def get_model_for_user(user_id: str) -> tuple[str, str]:
     """Get the model name and ID for a user"""
-    model_name = user_model_preferences.get(user_id, "maverick")
+    model_name = user_model_preferences.get(user_id, DEFAULT_MODEL_KEY)
     model_id = AVAILABLE_MODELS[model_name]
     return model_name, model_id
 
 
+def respond_in_thread(thread_ts: str, text: str, model_id: str) -> tuple[str, int]:
+    """Send the thread history plus a new user message to the LLM.
+
+    Returns the streamed reply and its chunk count. The user turn is only
+    added to the thread's history together with the reply, so a failed LLM
+    call does not leave an orphaned user message behind."""
+    history = conversation_history.setdefault(thread_ts, [])
+    user_turn = {"role": "user", "content": text}
+
+    returned_message = call_llm(history + [user_turn], model_id)
+
+    full_response = ""
+    token_count = 0
+
+    # Loop over OpenAI chat completion streamed chunk
+    for chunk in returned_message:
+        if hasattr(chunk, "choices") and chunk.choices:
+            delta = getattr(chunk.choices[0], "delta", None)
+            if delta and hasattr(delta, "content"):
+                content = delta.content
+                if content:
+                    full_response += content
+                    token_count += 1
+
+    history.extend((user_turn, {"role": "assistant", "content": full_response}))
+    return full_response, token_count
+
+
 @slack_app.event("app_mention")
 def handle_app_mention(event, say, client):
     """Handle @mentions of the bot"""
@@ -115,7 +149,7 @@ def handle_app_mention(event, say, client):
     metrics.unique_users.add(user_id)
 
     # Remove bot mention from text
-    text = text.split(">", 1)[-1].strip() if ">" in text else text.strip()
+    text = _MENTION_RE.sub("", text, count=1).strip()
 
     # Handle commands
     if "help" in text.lower() or text == "":
@@ -168,13 +202,6 @@ Use `@PromptBot use [model-name]` to switch."""
         say(text="❌ Model not found. Use `@PromptBot models` to see options.", thread_ts=thread_ts)
         return
 
-    # Get conversation history
-    if thread_ts not in conversation_history:
-        conversation_history[thread_ts] = []
-
-    # Add user message to history
-    conversation_history[thread_ts].append({"role": "user", "content": text})
-
     # Get model for user
     model_name, model_id = get_model_for_user(user_id)
     metrics.model_usage[model_name] += 1
@@ -188,29 +215,12 @@ Use `@PromptBot use [model-name]` to switch."""
         )
         message_ts = result["ts"]
 
-        # Call LLM and stream response
-        returned_message = call_llm(conversation_history[thread_ts], model_id)
-
-        # Collect streamed response
-        full_response = ""
-        token_count = 0
-
-        # Loop over OpenAI chat completion streamed chunk
-        for chunk in returned_message:
-            if hasattr(chunk, "choices") and chunk.choices:
-                delta = getattr(chunk.choices[0], "delta", None)
-                if delta and hasattr(delta, "content"):
-                    content = delta.content
-                    if content:
-                        full_response += content
-                        token_count += 1
+        # Call LLM and collect the streamed response
+        full_response, token_count = respond_in_thread(thread_ts, text, model_id)
 
         # Update metrics
         metrics.total_tokens += token_count
 
-        # Update conversation history
-        conversation_history[thread_ts].append({"role": "assistant", "content": full_response})
-
         # Update message with full response
         final_text = f"{full_response}\n\n_Using {model_name} ({model_id})_"
         client.chat_update(
@@ -297,13 +307,6 @@ Use `use [model-name]` to switch."""
         say(text="❌ Model not found. Use `models` to see options.", channel=channel_id)
         return
 
-    # Get conversation history
-    if thread_ts not in conversation_history:
-        conversation_history[thread_ts] = []
-
-    # Add user message to history
-    conversation_history[thread_ts].append({"role": "user", "content": text})
-
     # Get model for user
     model_name, model_id = get_model_for_user(user_id)
     metrics.model_usage[model_name] += 1
@@ -316,29 +319,12 @@ Use `use [model-name]` to switch."""
         )
         message_ts = result["ts"]
 
-        # Call LLM and stream response
-        returned_message = call_llm(conversation_history[thread_ts], model_id)
-
-        # Collect streamed response
-        full_response = ""
-        token_count = 0
-
-        # Loop over OpenAI chat completion streamed chunk
-        for chunk in returned_message:
-            if hasattr(chunk, "choices") and chunk.choices:
-                delta = getattr(chunk.choices[0], "delta", None)
-                if delta and hasattr(delta, "content"):
-                    content = delta.content
-                    if content:
-                        full_response += content
-                        token_count += 1
+        # Call LLM and collect the streamed response
+        full_response, token_count = respond_in_thread(thread_ts, text, model_id)
 
         # Update metrics
         metrics.total_tokens += token_count
 
-        # Update conversation history
-        conversation_history[thread_ts].append({"role": "assistant", "content": full_response})
-
         # Update message with full response
         final_text = f"{full_response}\n\n_Using {model_name} ({model_id})_"
         client.chat_update(
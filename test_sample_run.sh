@@ -37,11 +37,16 @@ platform: darwin -- Python 3.11.0, pytest-7.4.0, pluggy-1.0.0
 rootdir: /Users/anand.rao/repos/bolttest
 configfile: pytest.ini
 plugins: cov-4.1.0, mock-3.11.1, timeout-2.1.0
-collected 1 item
+collected 6 items
 
-tests/test_chat_cli_openai.py::TestColors::test_color_codes PASSED      [100%]
+tests/test_chat_cli_openai.py::TestColors::test_color_code[BLUE-\x1b[94m] PASSED [ 16%]
+tests/test_chat_cli_openai.py::TestColors::test_color_code[GREEN-\x1b[92m] PASSED [ 33%]
+tests/test_chat_cli_openai.py::TestColors::test_color_code[YELLOW-\x1b[93m] PASSED [ 50%]
+tests/test_chat_cli_openai.py::TestColors::test_color_code[RED-\x1b[91m] PASSED [ 66%]
+tests/test_chat_cli_openai.py::TestColors::test_color_code[BOLD-\x1b[1m] PASSED [ 83%]
+tests/test_chat_cli_openai.py::TestColors::test_color_code[END-\x1b[0m] PASSED [100%]
 
-============================== 1 passed in 0.05s ===============================
+============================== 6 passed in 0.05s ===============================
 
 Coverage Report:
 ----------------
@@ -5,13 +5,20 @@ Provides reusable test components and setup/teardown logic
 
 import os
 import sys
+import logging
+import runpy
 import pytest
+from io import StringIO
+from contextlib import redirect_stdout
 from unittest.mock import Mock, MagicMock, patch
 import tempfile
 import shutil
+from pathlib import Path
+from types import MappingProxyType, ModuleType, SimpleNamespace
 
 # Add parent directory to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ROOT_DIR = str(Path(__file__).resolve().parent.parent)
+sys.path.insert(0, ROOT_DIR)
 
 
 # ============================================================================
@@ -70,20 +77,176 @@ def full_openai_env(openai_env, slack_env):
     yield os.environ
 
 
+# ============================================================================
+# Module Fixtures
+# ============================================================================
+
+CHAT_CLI_PATH = os.path.join(ROOT_DIR, "chat_cli_openai.py")
+_chat_cli_code = None
+_chat_cli_modules = {}
+
+
+def load_chat_cli(mode):
+    """Execute chat_cli_openai.py with the given MODE (None = unset) into a
+    fresh module object, once per mode for the whole session"""
+    global _chat_cli_code
+    if mode not in _chat_cli_modules:
+        # Read and compile the source once; each mode only re-runs the body
+        if _chat_cli_code is None:
+            with open(CHAT_CLI_PATH) as f:
+                _chat_cli_code = compile(f.read(), CHAT_CLI_PATH, "exec")
+        module = ModuleType("chat_cli_openai")
+        module.__file__ = CHAT_CLI_PATH
+        env = {} if mode is None else {"MODE": mode}
+        with patch.dict(os.environ, env, clear=True):
+            exec(_chat_cli_code, module.__dict__)
+        _chat_cli_modules[mode] = module
+    return _chat_cli_modules[mode]
+
+
+def _run_example(env):
+    """Run example_usage.py top to bottom under exactly the given environment"""
+    with patch.dict(os.environ, env, clear=True):
+        return runpy.run_path(os.path.join(ROOT_DIR, "example_usage.py"), run_name="__main__")
+
+
+@pytest.fixture(scope="session")
+def run_example():
+    """run_example(env): execute example_usage.py as a script under env"""
+    return _run_example
+
+
+@pytest.fixture(scope="session")
+def chat_cli_mode(request):
+    """chat_cli_openai as configured for a MODE; request it with
+    ``@pytest.mark.parametrize("chat_cli_mode", ["openai"], indirect=True)``"""
+    return load_chat_cli(request.param)
+
+
+@pytest.fixture
+def chat_cli(request, monkeypatch):
+    """chat_cli_openai for a known MODE ("openai" unless parametrized
+    indirectly), installed as sys.modules["chat_cli_openai"] for the test so
+    patch("chat_cli_openai....") targets reach the same module object"""
+    module = load_chat_cli(getattr(request, "param", "openai"))
+    monkeypatch.setitem(sys.modules, "chat_cli_openai", module)
+    return module
+
+
+@pytest.fixture
+def slack_app():
+    """app_openai itself, imported on first use rather than at collection"""
+    import app_openai
+    return app_openai
+
+
+def capture_stdout(func):
+    """Return everything func() prints to stdout"""
+    buffer = StringIO()
+    with redirect_stdout(buffer):
+        func()
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="session")
+def banner_output(chat_cli_mode):
+    """print_banner() output, captured once per MODE"""
+    return capture_stdout(chat_cli_mode.print_banner)
+
+
+@pytest.fixture(scope="session")
+def models_output(chat_cli_mode):
+    """print_models() output, captured once per MODE"""
+    return capture_stdout(chat_cli_mode.print_models)
+
+
+# ============================================================================
+# Live API Fixtures
+# ============================================================================
+# One real client per provider for the whole session, so live-API tests share
+# its connection pool instead of opening a new connection each.
+
+@pytest.fixture(scope="session")
+def openai_real_client():
+    """Real OpenAI client (skips without OPENAI_API_KEY)"""
+    if not os.environ.get("OPENAI_API_KEY"):
+        pytest.skip("OpenAI API key not available")
+    from openai import OpenAI
+    client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+    yield client
+    client.close()
+
+
+@pytest.fixture(scope="session")
+def databricks_real_client():
+    """Real Databricks serving-endpoints client (skips without credentials)"""
+    if not os.environ.get("DATABRICKS_HOST") or not os.environ.get("DATABRICKS_TOKEN"):
+        pytest.skip("Databricks credentials not available")
+    from openai import OpenAI
+    client = OpenAI(
+        api_key=os.environ["DATABRICKS_TOKEN"],
+        base_url=f"{os.environ['DATABRICKS_HOST']}/serving-endpoints"
+    )
+    yield client
+    client.close()
+
+
 # ============================================================================
 # Mock Objects Fixtures
 # ============================================================================
 
+def make_response(content):
+    """Plain stub shaped like an OpenAI chat completion response
+
+    Only ``.choices[0].message.content`` is read, so a namespace is enough;
+    keep Mock for objects whose calls are asserted on."""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture(scope="session")
+def mock_response_factory():
+    """Build a stub shaped like an OpenAI chat completion response"""
+    return make_response
+
+
 @pytest.fixture
-def mock_openai_client():
+def mock_openai_client(mock_response_factory):
     """Mock OpenAI client with common setup"""
     client = Mock()
-    response = Mock()
-    response.choices = [Mock(message=Mock(content="Test response"))]
-    client.chat.completions.create.return_value = response
+    client.chat.completions.create.return_value = mock_response_factory("Test response")
     return client
 
 
+class OpenAIMock:
+    """Handle on a patched OpenAI class and the client it returns"""
+
+    def __init__(self, client_class, make_response):
+        self.client_class = client_class
+        self.client = client_class.return_value
+        self.create = self.client.chat.completions.create
+        self._make_response = make_response
+
+    def reply(self, *contents):
+        """Answer every call with one reply, or successive calls with several"""
+        responses = [self._make_response(content) for content in contents]
+        if len(responses) == 1:
+            self.create.side_effect = None
+            self.create.return_value = responses[0]
+        else:
+            self.create.side_effect = responses
+
+    def error(self, exc):
+        """Make every completion call raise exc"""
+        self.create.side_effect = exc
+
+
+@pytest.fixture
+def openai_mock(chat_cli, mock_response_factory):
+    """Patch chat_cli_openai.OpenAI; seed replies with openai_mock.reply(...)"""
+    with patch("chat_cli_openai.OpenAI") as client_class:
+        yield OpenAIMock(client_class, mock_response_factory)
+
+
 @pytest.fixture
 def mock_openai_client_with_error():
     """Mock OpenAI client that raises errors"""
@@ -113,34 +276,55 @@ def mock_slack_client():
 # ============================================================================
 # Sample Data Fixtures
 # ============================================================================
+# Session-scoped and read-only: tests that need to modify one should take a
+# copy first, e.g. ``event = dict(sample_slack_event)``.
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_messages():
     """Sample conversation messages"""
-    return [
+    return tuple(MappingProxyType(message) for message in [
         {"role": "user", "content": "Hello, how are you?"},
         {"role": "assistant", "content": "I'm doing well, thank you!"},
         {"role": "user", "content": "What can you help me with?"}
-    ]
+    ])
+
+
+@pytest.fixture(scope="session")
+def _large_history():
+    """200-message conversation: 100 user/assistant exchanges, built once"""
+    return tuple(
+        message
+        for i in range(100)
+        for message in (
+            {"role": "user", "content": f"Message {i}"},
+            {"role": "assistant", "content": f"Response {i}"}
+        )
+    )
 
 
 @pytest.fixture
+def large_history(_large_history):
+    """Fresh list[dict] copy of the 200-message conversation, shaped like the CLI's history"""
+    return [dict(message) for message in _large_history]
+
+
+@pytest.fixture(scope="session")
 def sample_slack_event():
     """Sample Slack mention event"""
-    return {
+    return MappingProxyType({
         "type": "app_mention",
         "user": "U123456789",
         "text": "<@U987654321> Hello bot!",
         "ts": "1234567890.123456",
         "channel": "C123456789",
         "event_ts": "1234567890.123456"
-    }
+    })
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_slack_event_with_thread():
     """Sample Slack mention event in a thread"""
-    return {
+    return MappingProxyType({
         "type": "app_mention",
         "user": "U123456789",
         "text": "<@U987654321> Follow up question",
@@ -148,26 +332,26 @@ def sample_slack_event_with_thread():
         "thread_ts": "1234567890.123456",
         "channel": "C123456789",
         "event_ts": "1234567890.234567"
-    }
+    })
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_slack_dm_event():
     """Sample Slack direct message event"""
-    return {
+    return MappingProxyType({
         "type": "message",
         "channel_type": "im",
         "user": "U123456789",
         "text": "Hello bot!",
         "ts": "1234567890.123456",
         "channel": "D123456789"
-    }
+    })
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_slack_command():
     """Sample Slack slash command"""
-    return {
+    return MappingProxyType({
         "token": "verification_token",
         "team_id": "T123456",
         "team_domain": "test-team",
@@ -179,7 +363,7 @@ def sample_slack_command():
         "text": "What is Python?",
         "response_url": "https://hooks.slack.com/commands/1234/5678",
         "trigger_id": "123456789.123456789.abcd"
-    }
+    })
 
 
 # ============================================================================
@@ -210,13 +394,11 @@ def temp_env_file(temp_dir):
 # ============================================================================
 
 @pytest.fixture
-def patch_openai_class():
+def patch_openai_class(mock_response_factory):
     """Patch OpenAI class"""
     with patch("openai.OpenAI") as mock_class:
         mock_instance = Mock()
-        mock_response = Mock()
-        mock_response.choices = [Mock(message=Mock(content="Mocked response"))]
-        mock_instance.chat.completions.create.return_value = mock_response
+        mock_instance.chat.completions.create.return_value = mock_response_factory("Mocked response")
         mock_class.return_value = mock_instance
         yield mock_class
 
@@ -235,19 +417,30 @@ def patch_print():
         yield mock_print
 
 
+@pytest.fixture
+def silent_print(monkeypatch):
+    """Discard print() output for tests that never inspect it"""
+    monkeypatch.setattr("builtins.print", lambda *args, **kwargs: None)
+
+
 # ============================================================================
 # Utility Functions
 # ============================================================================
 
+@pytest.fixture(scope="session")
+def _log_handler():
+    """Build one capturing log handler; capture_logs attaches it per test"""
+    handler = logging.StreamHandler(StringIO())
+    handler.setLevel(logging.DEBUG)
+    return handler
+
+
 @pytest.fixture
-def capture_logs():
+def capture_logs(_log_handler):
     """Capture log messages during tests"""
-    import logging
-    from io import StringIO
-
-    log_capture = StringIO()
-    handler = logging.StreamHandler(log_capture)
-    handler.setLevel(logging.DEBUG)
+    log_capture = _log_handler.stream
+    log_capture.seek(0)
+    log_capture.truncate()
 
     # Get all loggers
     loggers = [
@@ -255,60 +448,109 @@ def capture_logs():
         logging.getLogger("chat_cli_openai"),
         logging.getLogger()
     ]
+    levels = [logger.level for logger in loggers]
 
     for logger in loggers:
-        logger.addHandler(handler)
+        logger.addHandler(_log_handler)
         logger.setLevel(logging.DEBUG)
 
     yield log_capture
 
-    for logger in loggers:
-        logger.removeHandler(handler)
+    for logger, level in zip(loggers, levels):
+        logger.removeHandler(_log_handler)
+        logger.setLevel(level)
+
+
+@pytest.fixture(scope="session")
+def _time_patcher():
+    """Build the time.time patcher once; mock_time starts it per test"""
+    return patch("time.time", Mock(return_value=1234567890.0))
 
 
 @pytest.fixture
-def mock_time():
+def mock_time(_time_patcher):
     """Mock time for performance tests"""
-    with patch("time.time") as mock_time_func:
-        mock_time_func.return_value = 1234567890.0
-        yield mock_time_func
+    mock_time_func = _time_patcher.start()
+    mock_time_func.reset_mock(return_value=True, side_effect=True)
+    mock_time_func.return_value = 1234567890.0
+    yield mock_time_func
+    _time_patcher.stop()
+
+
+def _printed(mock_print, needle):
+    """True if needle appears in any argument passed to a patched print"""
+    return any(
+        needle in str(arg)
+        for call in mock_print.call_args_list
+        for arg in call.args
+    )
+
+
+@pytest.fixture(scope="session")
+def printed():
+    """printed(mock_print, needle): search a patched print's arguments"""
+    return _printed
 
 
 # ============================================================================
 # Test Markers and Configuration
 # ============================================================================
 
+MARKERS = (
+    "unit: mark test as a unit test",
+    "integration: mark test as an integration test",
+    "performance: mark test as a performance test",
+    "slow: mark test as slow running",
+    "skip_ci: mark test to skip in CI/CD",
+    "live_api: mark test as making real network calls",
+)
+
+
+def pytest_addoption(parser):
+    """Add the --run-live switch for tests that call the real APIs"""
+    parser.addoption(
+        "--run-live", action="store_true", default=False,
+        help="run tests marked live_api (real network calls)"
+    )
+
+
 def pytest_configure(config):
     """Configure custom pytest markers"""
-    config.addinivalue_line(
-        "markers", "unit: mark test as a unit test"
-    )
-    config.addinivalue_line(
-        "markers", "integration: mark test as an integration test"
-    )
-    config.addinivalue_line(
-        "markers", "performance: mark test as a performance test"
-    )
-    config.addinivalue_line(
-        "markers", "slow: mark test as slow running"
-    )
-    config.addinivalue_line(
-        "markers", "skip_ci: mark test to skip in CI/CD"
-    )
+    for marker in MARKERS:
+        config.addinivalue_line("markers", marker)
 
 
 def pytest_collection_modifyitems(config, items):
     """Modify test collection to add markers based on test names"""
+    integration = pytest.mark.integration
+    performance = pytest.mark.performance
+    unit = pytest.mark.unit
+    not_unit = {"integration", "performance"}
+    # "-m integration" / "-m performance" never look at unit marks, so skip
+    # building the per-item marker set entirely in that case
+    mark_unit = config.getoption("markexpr") not in not_unit
+    # Skip rather than deselect, so this holds whatever -m expression is given
+    skip_live = None if config.getoption("--run-live") else pytest.mark.skip(
+        reason="real API call; use --run-live to run"
+    )
+
     for item in items:
+        nodeid = item.nodeid
+
+        if skip_live and item.get_closest_marker("live_api"):
+            item.add_marker(skip_live)
+        names = {mark.name for mark in item.iter_markers()} if mark_unit else set()
+
         # Auto-mark integration tests
-        if "integration" in item.nodeid:
-            item.add_marker(pytest.mark.integration)
+        if "integration" in nodeid:
+            item.add_marker(integration)
+            names.add("integration")
 
         # Auto-mark performance tests
-        if "performance" in item.nodeid:
-            item.add_marker(pytest.mark.performance)
+        if "performance" in nodeid:
+            item.add_marker(performance)
+            names.add("performance")
 
         # Auto-mark unit tests
-        if "unit" in item.nodeid or "Test" in item.nodeid:
-            if not any(mark.name in ["integration", "performance"] for mark in item.iter_markers()):
-                item.add_marker(pytest.mark.unit)
\ No newline at end of file
+        if mark_unit and ("unit" in nodeid or "Test" in nodeid) and not names & not_unit:
+            item.add_marker(unit)
@@ -0,0 +1,60 @@
+"""
+Tests for app.py
+Tests bot-mention parsing in the app_mention handler
+"""
+
+import sys
+import pytest
+from unittest.mock import patch, MagicMock
+
+for _dependency in ("dotenv", "openai", "slack_bolt", "fastapi", "uvicorn"):
+    pytest.importorskip(_dependency)
+
+
+@pytest.fixture(scope="module")
+def app_module():
+    """Import app with slack_bolt.App patched so no Slack connection is made"""
+    with patch("slack_bolt.App") as mock_app:
+        # Keep the decorated handlers as plain functions
+        mock_app.return_value.event.return_value = lambda handler: handler
+        sys.modules.pop("app", None)
+        import app
+        yield app
+    sys.modules.pop("app", None)
+
+
+@pytest.fixture
+def mention(app_module):
+    """Run handle_app_mention on some text; returns (say, respond_in_thread)"""
+
+    def _mention(text):
+        say = MagicMock()
+        event = {"user": "U999", "channel": "C123", "text": text, "ts": "1234.5678"}
+        with patch.object(app_module, "respond_in_thread", return_value=("ok", 1)) as respond:
+            app_module.handle_app_mention(event, say, MagicMock())
+        return say, respond
+
+    return _mention
+
+
+class TestMentionParsing:
+    """Test stripping of the bot mention from app_mention text"""
+
+    @pytest.mark.parametrize("text,expected", [
+        ("<@U123ABC|promptbot> what is Python?", "what is Python?"),
+        ("tell <@U123ABC> me a joke", "tell me a joke"),
+        ("is 3 > 2?", "is 3 > 2?"),
+    ], ids=["labelled-mention", "mid-text-mention", "gt-without-mention"])
+    def test_prompt_sent_to_llm(self, text, expected, mention):
+        """Test the prompt reaching the LLM has only the mention removed"""
+        say, respond = mention(text)
+
+        respond.assert_called_once()
+        assert respond.call_args.args[1] == expected
+
+    def test_help_after_mention(self, mention):
+        """Test a command following the mention is still recognised"""
+        say, respond = mention("<@U123ABC|promptbot> help")
+
+        respond.assert_not_called()
+        assert "PromptBot Help" in say.call_args.kwargs["text"]
@@ -8,33 +8,72 @@ import sys
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from openai import OpenAI
-import chat_cli_openai
-import app_openai
+# Read once at import; the skipif conditions below only need a snapshot
+_OPENAI_KEY = os.environ.get("OPENAI_API_KEY")
+_DBX_TOKEN = os.environ.get("DATABRICKS_TOKEN")
+_DBX_HOST = os.environ.get("DATABRICKS_HOST")
+
+# Ten mentions in separate threads, shared by the concurrency test
+_SLACK_EVENTS_10 = tuple(
+    {"text": f"<@U123> Message {i}", "ts": f"{i}.123456", "user": "U789"}
+    for i in range(10)
+)
+
+
+@pytest.fixture
+def _reset_history(slack_app):
+    """Start and finish every test with an empty Slack conversation_history"""
+    slack_app.conversation_history.clear()
+    yield
+    slack_app.conversation_history.clear()
+
+
+class FakeClock:
+    """Virtual clock: sleep() advances now instead of blocking"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """Replace time.time/time.sleep with a FakeClock for the test"""
+    clock = FakeClock()
+    monkeypatch.setattr(time, "time", clock.time)
+    monkeypatch.setattr(time, "sleep", clock.sleep)
+    return clock
+
+
+def _rate_limit_error():
+    """Exception carrying the HTTP 429 status a rate-limited call reports"""
+    error = Exception("Rate limit exceeded")
+    error.status_code = 429
+    return error
 
 
 class TestAPIIntegration:
     """Integration tests for API calls"""
 
     @pytest.mark.integration
+    @pytest.mark.live_api
     @pytest.mark.skipif(
-        not os.environ.get("OPENAI_API_KEY") and not os.environ.get("DATABRICKS_TOKEN"),
+        not _OPENAI_KEY and not _DBX_TOKEN,
         reason="No API credentials available"
     )
-    def test_real_api_call_openai(self):
+    def test_real_api_call_openai(self, openai_real_client):
         """Test actual OpenAI API call (requires OPENAI_API_KEY)"""
-        if not os.environ.get("OPENAI_API_KEY"):
-            pytest.skip("OpenAI API key not available")
-
-        client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-
         messages = [{"role": "user", "content": "Say 'test successful' and nothing else"}]
 
-        response = client.chat.completions.create(
+        response = openai_real_client.chat.completions.create(
             model="gpt-3.5-turbo",
             messages=messages,
             max_tokens=10,
@@ -44,23 +83,16 @@ class TestAPIIntegration:
         assert response.choices[0].message.content.lower().strip() == "test successful"
 
     @pytest.mark.integration
+    @pytest.mark.live_api
     @pytest.mark.skipif(
-        not os.environ.get("DATABRICKS_TOKEN"),
+        not (_DBX_HOST and _DBX_TOKEN),
         reason="Databricks credentials not available"
     )
-    def test_real_api_call_databricks(self):
+    def test_real_api_call_databricks(self, databricks_real_client):
         """Test actual Databricks API call (requires DATABRICKS_TOKEN)"""
-        if not os.environ.get("DATABRICKS_HOST") or not os.environ.get("DATABRICKS_TOKEN"):
-            pytest.skip("Databricks credentials not available")
-
-        client = OpenAI(
-            api_key=os.environ.get("DATABRICKS_TOKEN"),
-            base_url=f"{os.environ.get('DATABRICKS_HOST')}/serving-endpoints"
-        )
-
         messages = [{"role": "user", "content": "Say 'test successful' and nothing else"}]
 
-        response = client.chat.completions.create(
+        response = databricks_real_client.chat.completions.create(
             model="databricks-meta-llama-3-1-8b-instruct",
             messages=messages,
             max_tokens=10,
@@ -70,84 +102,53 @@ class TestAPIIntegration:
         assert "test" in response.choices[0].message.content.lower()
 
     @pytest.mark.integration
-    def test_api_timeout_handling(self):
-        """Test handling of API timeouts"""
-        with patch("openai.OpenAI") as mock_openai_class:
-            mock_client = Mock()
-            mock_client.chat.completions.create.side_effect = TimeoutError("Request timeout")
-            mock_openai_class.return_value = mock_client
+    @pytest.mark.parametrize("error,expected", [
+        (TimeoutError("Request timeout"), "timeout"),
+        (_rate_limit_error(), "error"),
+        (ConnectionError("Network error"), "error"),
+    ], ids=["timeout", "rate_limit", "network"])
+    def test_api_error_handling(self, openai_mock, error, expected, chat_cli):
+        """Test handling of API timeouts, rate limiting and network errors"""
+        openai_mock.error(error)
 
-            messages = [{"role": "user", "content": "Test"}]
-            result = chat_cli_openai.get_model_response(mock_client, "test-model", messages)
-
-            assert "Error" in result
-            assert "timeout" in result.lower()
-
-    @pytest.mark.integration
-    def test_rate_limit_handling(self):
-        """Test handling of rate limiting"""
-        with patch("openai.OpenAI") as mock_openai_class:
-            mock_client = Mock()
-            # Simulate rate limit error
-            mock_error = Exception("Rate limit exceeded")
-            mock_error.status_code = 429
-            mock_client.chat.completions.create.side_effect = mock_error
-            mock_openai_class.return_value = mock_client
-
-            messages = [{"role": "user", "content": "Test"}]
-            result = chat_cli_openai.get_model_response(mock_client, "test-model", messages)
+        messages = [{"role": "user", "content": "Test"}]
+        result = chat_cli.get_model_response(openai_mock.client, "test-model", messages)
 
-            assert "Error" in result
+        assert "Error" in result
+        assert expected in result.lower()
 
     @pytest.mark.integration
-    def test_invalid_api_key_handling(self):
+    @pytest.mark.live_api
+    def test_invalid_api_key_handling(self, chat_cli):
         """Test handling of invalid API keys"""
+        from openai import OpenAI
         client = OpenAI(api_key="invalid-key-12345")
 
         messages = [{"role": "user", "content": "Test"}]
-        result = chat_cli_openai.get_model_response(client, "test-model", messages)
+        result = chat_cli.get_model_response(client, "test-model", messages)
 
         assert "Error" in result
 
-    @pytest.mark.integration
-    def test_network_error_handling(self):
-        """Test handling of network errors"""
-        with patch("openai.OpenAI") as mock_openai_class:
-            mock_client = Mock()
-            mock_client.chat.completions.create.side_effect = ConnectionError("Network error")
-            mock_openai_class.return_value = mock_client
-
-            messages = [{"role": "user", "content": "Test"}]
-            result = chat_cli_openai.get_model_response(mock_client, "test-model", messages)
-
-            assert "Error" in result
-
 
 class TestEndToEndCLI:
     """End-to-end tests for CLI functionality"""
 
     @pytest.mark.integration
-    @patch("builtins.input")
-    @patch("builtins.print")
-    @patch("chat_cli_openai.OpenAI")
-    def test_full_conversation_flow(self, mock_openai_class, mock_print, mock_input):
+    def test_full_conversation_flow(self, patch_input, silent_print, openai_mock, chat_cli):
         """Test a complete conversation flow"""
         with patch.dict(os.environ, {
             "MODE": "openai",
             "OPENAI_API_KEY": "test-key"
         }):
             # Setup mock responses
-            mock_client = Mock()
-            responses = [
-                Mock(choices=[Mock(message=Mock(content="Hello! How can I help?"))]),
-                Mock(choices=[Mock(message=Mock(content="Python is a programming language"))]),
-                Mock(choices=[Mock(message=Mock(content="It was created by Guido van Rossum"))])
-            ]
-            mock_client.chat.completions.create.side_effect = responses
-            mock_openai_class.return_value = mock_client
+            openai_mock.reply(
+                "Hello! How can I help?",
+                "Python is a programming language",
+                "It was created by Guido van Rossum"
+            )
 
             # Simulate user interaction
-            mock_input.side_effect = [
+            patch_input.side_effect = [
                 "1",  # Select model
                 "Hello",  # First message
                 "What is Python?",  # Second message
@@ -155,13 +156,13 @@ class TestEndToEndCLI:
                 "quit"  # Exit
             ]
 
-            chat_cli_openai.main()
+            chat_cli.main()
 
             # Verify conversation flow
-            assert mock_client.chat.completions.create.call_count == 3
+            assert openai_mock.create.call_count == 3
 
             # Check conversation history is maintained
-            calls = mock_client.chat.completions.create.call_args_list
+            calls = openai_mock.create.call_args_list
 
             # First call - 1 message
             assert len(calls[0][1]["messages"]) == 1
@@ -173,22 +174,16 @@ class TestEndToEndCLI:
             assert len(calls[2][1]["messages"]) == 5
 
     @pytest.mark.integration
-    @patch("builtins.input")
-    @patch("builtins.print")
-    @patch("chat_cli_openai.OpenAI")
-    def test_model_switching_flow(self, mock_openai_class, mock_print, mock_input):
+    def test_model_switching_flow(self, patch_input, silent_print, openai_mock, chat_cli):
         """Test model switching during conversation"""
         with patch.dict(os.environ, {
             "MODE": "openai",
             "OPENAI_API_KEY": "test-key"
         }):
-            mock_client = Mock()
-            mock_response = Mock(choices=[Mock(message=Mock(content="Response"))])
-            mock_client.chat.completions.create.return_value = mock_response
-            mock_openai_class.return_value = mock_client
+            openai_mock.reply("Response")
 
             # Simulate model switching
-            mock_input.side_effect = [
+            patch_input.side_effect = [
                 "1",  # Initial model
                 "Test message",  # Send message
                 "switch",  # Switch command
@@ -197,10 +192,10 @@ class TestEndToEndCLI:
                 "quit"
             ]
 
-            chat_cli_openai.main()
+            chat_cli.main()
 
             # Verify model switching
-            calls = mock_client.chat.completions.create.call_args_list
+            calls = openai_mock.create.call_args_list
             assert len(calls) == 2
 
             # Check different models were used
@@ -208,29 +203,28 @@ class TestEndToEndCLI:
             assert calls[1][1]["model"] == "gpt-4o-mini"
 
 
+@pytest.mark.usefixtures("_reset_history")
 class TestEndToEndSlack:
     """End-to-end tests for Slack bot functionality"""
 
     @pytest.mark.integration
     @patch("app_openai.openai_client")
-    def test_slack_conversation_flow(self, mock_client):
+    def test_slack_conversation_flow(self, mock_client, mock_slack_say, mock_slack_client, mock_response_factory, slack_app):
         """Test a complete Slack conversation flow"""
         # Setup mock responses
         responses = [
-            Mock(choices=[Mock(message=Mock(content="Hello!"))]),
-            Mock(choices=[Mock(message=Mock(content="I remember our conversation"))])
+            mock_response_factory("Hello!"),
+            mock_response_factory("I remember our conversation")
         ]
         mock_client.chat.completions.create.side_effect = responses
 
-        mock_say = Mock()
-
         # First message
         event1 = {
             "text": "<@U123> Hello bot",
             "ts": "1234567890.123456",
             "user": "U789"
         }
-        app_openai.handle_app_mentions(event1, mock_say, Mock())
+        slack_app.handle_app_mentions(event1, mock_slack_say, mock_slack_client)
 
         # Second message in same thread
         event2 = {
@@ -239,7 +233,7 @@ class TestEndToEndSlack:
             "thread_ts": "1234567890.123456",
             "user": "U789"
         }
-        app_openai.handle_app_mentions(event2, mock_say, Mock())
+        slack_app.handle_app_mentions(event2, mock_slack_say, mock_slack_client)
 
         # Verify conversation continuity
         assert mock_client.chat.completions.create.call_count == 2
@@ -251,20 +245,18 @@ class TestEndToEndSlack:
 
     @pytest.mark.integration
     @patch("app_openai.openai_client")
-    def test_slack_multi_thread_isolation(self, mock_client):
+    def test_slack_multi_thread_isolation(self, mock_client, mock_slack_say, mock_slack_client, mock_response_factory, slack_app):
         """Test that different threads maintain separate conversations"""
-        mock_response = Mock(choices=[Mock(message=Mock(content="Response"))])
+        mock_response = mock_response_factory("Response")
         mock_client.chat.completions.create.return_value = mock_response
 
-        mock_say = Mock()
-
         # Message in thread 1
         event1 = {
             "text": "<@U123> Thread 1 message",
             "ts": "1111111111.111111",
             "user": "U789"
         }
-        app_openai.handle_app_mentions(event1, mock_say, Mock())
+        slack_app.handle_app_mentions(event1, mock_slack_say, mock_slack_client)
 
         # Message in thread 2
         event2 = {
@@ -272,39 +264,35 @@ class TestEndToEndSlack:
             "ts": "2222222222.222222",
             "user": "U789"
         }
-        app_openai.handle_app_mentions(event2, mock_say, Mock())
+        slack_app.handle_app_mentions(event2, mock_slack_say, mock_slack_client)
 
         # Verify separate histories
-        assert len(app_openai.conversation_history) == 2
-        assert "1111111111.111111" in app_openai.conversation_history
-        assert "2222222222.222222" in app_openai.conversation_history
+        assert len(slack_app.conversation_history) == 2
+        thread1 = slack_app.conversation_history.get("1111111111.111111")
+        thread2 = slack_app.conversation_history.get("2222222222.222222")
+        assert thread1 is not None and thread2 is not None
 
         # Each should have its own messages
-        thread1_messages = app_openai.conversation_history["1111111111.111111"]["messages"]
-        thread2_messages = app_openai.conversation_history["2222222222.222222"]["messages"]
-
-        assert thread1_messages[0]["content"] == "Thread 1 message"
-        assert thread2_messages[0]["content"] == "Thread 2 message"
+        assert thread1["messages"][0]["content"] == "Thread 1 message"
+        assert thread2["messages"][0]["content"] == "Thread 2 message"
 
 
 class TestPerformance:
     """Performance and load tests"""
 
     @pytest.mark.performance
-    @patch("chat_cli_openai.OpenAI")
-    def test_response_time(self, mock_openai_class):
+    def test_response_time(self, fake_clock, mock_response_factory, chat_cli):
         """Test that responses are generated within acceptable time"""
         mock_client = Mock()
 
         def delayed_response(*args, **kwargs):
-            time.sleep(0.1)  # Simulate API delay
-            return Mock(choices=[Mock(message=Mock(content="Response"))])
+            time.sleep(0.1)  # Simulate API delay (virtual, see fake_clock)
+            return mock_response_factory("Response")
 
         mock_client.chat.completions.create.side_effect = delayed_response
-        mock_openai_class.return_value = mock_client
 
         start_time = time.time()
-        result = chat_cli_openai.get_model_response(
+        result = chat_cli.get_model_response(
             mock_client,
             "test-model",
             [{"role": "user", "content": "Test"}]
@@ -312,22 +300,17 @@ class TestPerformance:
         end_time = time.time()
 
         assert result == "Response"
-        assert end_time - start_time < 1  # Should complete within 1 second
+        # Only the simulated API delay elapses on the fake clock
+        assert end_time - start_time == pytest.approx(0.1)
 
     @pytest.mark.performance
-    def test_large_conversation_history(self):
+    def test_large_conversation_history(self, large_history, mock_response_factory, chat_cli):
         """Test handling of large conversation histories"""
         mock_client = Mock()
-        mock_response = Mock(choices=[Mock(message=Mock(content="Response"))])
+        mock_response = mock_response_factory("Response")
         mock_client.chat.completions.create.return_value = mock_response
 
-        # Create large conversation history
-        messages = []
-        for i in range(100):
-            messages.append({"role": "user", "content": f"Message {i}"})
-            messages.append({"role": "assistant", "content": f"Response {i}"})
-
-        result = chat_cli_openai.get_model_response(mock_client, "test-model", messages)
+        result = chat_cli.get_model_response(mock_client, "test-model", large_history)
 
         assert result == "Response"
         # Verify the full history was sent
@@ -335,31 +318,32 @@ class TestPerformance:
         assert len(call_args[1]["messages"]) == 200
 
     @pytest.mark.performance
+    @pytest.mark.usefixtures("_reset_history")
     @patch("app_openai.openai_client")
-    def test_concurrent_slack_messages(self, mock_client):
-        """Test handling of concurrent Slack messages"""
-        mock_response = Mock(choices=[Mock(message=Mock(content="Response"))])
-        mock_client.chat.completions.create.return_value = mock_response
+    def test_concurrent_slack_messages(self, mock_client, mock_slack_say, mock_slack_client, mock_response_factory, slack_app):
+        """Test that ten mentions delivered from worker threads each get a reply
 
-        mock_say = Mock()
+        Only checks that every event reached the LLM and landed under its own
+        thread key; it does not probe finer-grained races."""
+        mock_response = mock_response_factory("Response")
+        mock_client.chat.completions.create.return_value = mock_response
 
-        # Simulate multiple concurrent messages
-        threads = []
-        for i in range(10):
-            event = {
-                "text": f"<@U123> Message {i}",
-                "ts": f"{i}.123456",
-                "user": "U789"
-            }
-            app_openai.handle_app_mentions(event, mock_say, Mock())
+        # Deliver the messages concurrently, as Socket Mode's worker threads would
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            list(executor.map(
+                lambda event: slack_app.handle_app_mentions(event, mock_slack_say, mock_slack_client),
+                _SLACK_EVENTS_10
+            ))
 
-        # All messages should be processed
-        assert mock_client.chat.completions.create.call_count == 10
-        assert len(app_openai.conversation_history) == 10
+        # All messages should be processed; call_args_list grows by list.append,
+        # which unlike call_count += 1 cannot drop an update across threads
+        assert len(mock_client.chat.completions.create.call_args_list) == 10
+        assert len(slack_app.conversation_history) == 10
 
 
 if __name__ == "__main__":
     # Run tests with different markers
     # pytest.main([__file__, "-v", "-m", "not integration"])  # Skip integration tests
     # pytest.main([__file__, "-v", "-m", "integration"])  # Only integration tests
-    pytest.main([__file__, "-v", "--cov=chat_cli_openai", "--cov=app_openai", "--cov=example_usage", "--cov-report=html"])
\ No newline at end of file
+    # Coverage is opt-in: pass e.g. --cov=chat_cli_openai --cov=app_openai --cov-report=html
+    pytest.main([__file__, "-v", *sys.argv[1:]])
\ No newline at end of file